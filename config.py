@@ -18,6 +18,12 @@ BOTS_DIR.mkdir(exist_ok=True)
 
 # Docker configuration
 DOCKER_NETWORK = os.getenv("DOCKER_NETWORK", "botbuilder_network")
+BASE_IMAGE = os.getenv("BASE_IMAGE", "botbuilder-base:latest")
+NODEJS_BASE_IMAGE = "node:20-slim"
+BUILD_CONCURRENCY = int(os.getenv("BUILD_CONCURRENCY", "2"))
+
+# FSM storage (Redis if set, in-memory otherwise)
+REDIS_URL = os.getenv("REDIS_URL")
 
 # Bot limits
 MAX_BOTS_PER_USER = int(os.getenv("MAX_BOTS_PER_USER", "10"))
@@ -27,6 +33,7 @@ TEMPLATES_DIR = Path(__file__).parent / "templates"
 PYTHON_TEMPLATES_DIR = TEMPLATES_DIR / "python"
 NODEJS_TEMPLATES_DIR = TEMPLATES_DIR / "nodejs"
 DOCKER_TEMPLATES_DIR = TEMPLATES_DIR / "docker"
+BASE_DOCKERFILE = DOCKER_TEMPLATES_DIR / "Dockerfile.base"
 
 # Registry file path
 REGISTRY_FILE = Path(__file__).parent / "bot_registry.json"
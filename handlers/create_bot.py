@@ -1,5 +1,9 @@
 """Create bot command handler for BotBuilder."""
 
+import asyncio
+import re
+from contextlib import asynccontextmanager
+
 from aiogram import Router, types
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
@@ -9,20 +13,26 @@ from services.parser import RequirementParser
 from services.analyzer import ArchitectureAnalyzer
 from services.generator import CodeGenerator
 from services.file_manager import FileManager
-from services.deployment import DeploymentService
+from services.deployment import DeploymentService, base_image_for
 from services.registry import BotRegistry
-from utils.formatters import format_bot_overview, format_success_message, format_error_message, escape_markdown
-from config import MAX_BOTS_PER_USER
+from utils.formatters import format_bot_overview, format_error_message, escape_markdown
+from config import MAX_BOTS_PER_USER, BUILD_CONCURRENCY
 
 router = Router()
 
+# Input validation patterns
+_BOT_NAME_RE = re.compile(r'^[a-z0-9_-]+$')
+_TOKEN_RE = re.compile(r'^\d+:[A-Za-z0-9_-]{20,}$')
+
 # Initialize services
 parser = RequirementParser()
 analyzer = ArchitectureAnalyzer()
 generator = CodeGenerator()
 file_manager = FileManager()
-deployment = DeploymentService()
-registry = BotRegistry()
+
+# Bound concurrent bot builds so they don't thrash the disk
+_CREATE_SEM = asyncio.Semaphore(BUILD_CONCURRENCY)
+_queued = 0
 
 
 class BotCreationStates(StatesGroup):
@@ -32,8 +42,27 @@ class BotCreationStates(StatesGroup):
     waiting_token = State()
 
 
+@asynccontextmanager
+async def _build_slot(processing_msg: types.Message):
+    """Hold a build slot, telling the user their queue position while waiting."""
+    global _queued
+    if _CREATE_SEM.locked():
+        await processing_msg.edit_text(f"⏳ Queued (position ~{_queued + 1})...")
+    
+    _queued += 1
+    try:
+        await _CREATE_SEM.acquire()
+    finally:
+        _queued -= 1
+    
+    try:
+        yield
+    finally:
+        _CREATE_SEM.release()
+
+
 @router.message(Command("create"))
-async def create_command(message: types.Message, state: FSMContext):
+async def create_command(message: types.Message, state: FSMContext, registry: BotRegistry):
     """Start bot creation process."""
     user_id = message.from_user.id
     
@@ -48,8 +77,7 @@ async def create_command(message: types.Message, state: FSMContext):
     await message.answer(
         "🤖 **Let's create your bot!**\n\n"
         "Please describe what you want your bot to do.\n\n"
-        "Example: \"I want an expense tracker bot with categories and CSV export\"",
-        parse_mode="Markdown"
+        "Example: \"I want an expense tracker bot with categories and CSV export\""
     )
     await state.set_state(BotCreationStates.waiting_description)
 
@@ -70,19 +98,18 @@ async def process_description(message: types.Message, state: FSMContext):
         "The name should:\n"
         "• Be lowercase with underscores (e.g., `expense_tracker`)\n"
         "• Not contain spaces or special characters\n"
-        "• Be unique (not already used)",
-        parse_mode="Markdown"
+        "• Be unique (not already used)"
     )
     await state.set_state(BotCreationStates.waiting_name)
 
 
 @router.message(StateFilter(BotCreationStates.waiting_name))
-async def process_name(message: types.Message, state: FSMContext):
+async def process_name(message: types.Message, state: FSMContext, registry: BotRegistry):
     """Process bot name."""
     bot_name = message.text.strip().lower()
     
     # Validate name
-    if not bot_name.replace('_', '').replace('-', '').isalnum():
+    if not _BOT_NAME_RE.fullmatch(bot_name):
         await message.answer(
             "❌ Invalid bot name. Use only lowercase letters, numbers, underscores, and hyphens."
         )
@@ -110,19 +137,23 @@ async def process_name(message: types.Message, state: FSMContext):
         "2. Send `/newbot` command\n"
         "3. Follow the instructions\n"
         "4. Copy the token and send it here\n\n"
-        "The token looks like: `123456789:ABCdefGHIjklMNOpqrsTUVwxyz`",
-        parse_mode="Markdown"
+        "The token looks like: `123456789:ABCdefGHIjklMNOpqrsTUVwxyz`"
     )
     await state.set_state(BotCreationStates.waiting_token)
 
 
 @router.message(StateFilter(BotCreationStates.waiting_token))
-async def process_token(message: types.Message, state: FSMContext):
+async def process_token(
+    message: types.Message,
+    state: FSMContext,
+    registry: BotRegistry,
+    deployment: DeploymentService
+):
     """Process bot token and create bot."""
     bot_token = message.text.strip()
     
-    # Basic token validation (format: numbers:letters)
-    if ':' not in bot_token or len(bot_token) < 20:
+    # Token validation (format: <bot id>:<secret>)
+    if not _TOKEN_RE.fullmatch(bot_token):
         await message.answer(
             "❌ Invalid bot token format. Please provide a valid token from @BotFather."
         )
@@ -137,59 +168,69 @@ async def process_token(message: types.Message, state: FSMContext):
     processing_msg = await message.answer("🔄 Processing your request... This may take a minute.")
     
     try:
-        # Parse requirements
-        requirements = parser.parse(description)
-        
-        # Analyze architecture
-        architecture = analyzer.analyze(requirements)
-        
-        # Generate code
-        await processing_msg.edit_text("📝 Generating bot code...")
-        files = generator.generate_bot(bot_name, bot_token, requirements, architecture)
-        
-        # Create directory and write files
-        await processing_msg.edit_text("💾 Writing files...")
-        bot_dir = await file_manager.create_bot_directory(bot_name)
-        await file_manager.write_files(bot_name, files)
-        
-        # Build Docker image
-        await processing_msg.edit_text("🐳 Building Docker image...")
-        image_tag = deployment.build_image(bot_name, bot_dir)
-        if not image_tag:
-            raise Exception("Failed to build Docker image")
-        
-        # Create container
-        await processing_msg.edit_text("📦 Creating container...")
-        container_id = deployment.create_container(bot_name, image_tag, bot_token)
-        if not container_id:
-            raise Exception("Failed to create Docker container")
-        
-        # Start container
-        await processing_msg.edit_text("🚀 Starting bot...")
-        started = deployment.start_container(container_id)
-        if not started:
-            raise Exception("Failed to start container")
-        
-        # Register bot
-        await registry.register_bot(user_id, bot_name, bot_token, container_id, "running")
-        
-        # Success message
-        overview = format_bot_overview(bot_name, requirements, architecture)
-        safe_bot_name = escape_markdown(bot_name)
-        success_msg = (
-            f"{overview}\n\n"
-            f"✅ **Bot deployed successfully!**\n\n"
-            f"Your bot is now running. You can interact with it using the token you provided.\n\n"
-            f"**Bot Name:** `{safe_bot_name}`\n"
-            f"**Status:** Running\n"
-            f"**Container ID:** `{container_id[:12]}`\n\n"
-            f"Use `/list` to see all your bots or `/status {safe_bot_name}` to check status."
-        )
-        
-        await processing_msg.edit_text(success_msg, parse_mode="Markdown")
-        await state.clear()
+        # Waiting for a slot edits the message, so it must sit inside the try
+        async with _build_slot(processing_msg):
+            # Parse requirements
+            requirements = parser.parse(description)
+            
+            # Analyze architecture
+            architecture = analyzer.analyze(requirements)
+            
+            # Fetch the base image while the code is generated and written
+            pull_task = deployment.prewarm(requirements.language)
+            
+            # Generate code
+            await processing_msg.edit_text("📝 Generating bot code...")
+            # Rendering is CPU-bound, so keep it off the event loop
+            archive = await asyncio.to_thread(
+                generator.generate_bot_archive, bot_name, bot_token, requirements, architecture
+            )
+            
+            # Build Docker image from the archive, unpacking the source copy alongside
+            await processing_msg.edit_text("🐳 Building Docker image...")
+            await file_manager.create_bot_directory(bot_name)
+            if not await pull_task:
+                raise Exception(f"Base image {base_image_for(requirements.language)} is unavailable")
+            image_tag, _ = await asyncio.gather(
+                deployment.build_image(bot_name, archive),
+                file_manager.extract_archive(bot_name, archive)
+            )
+            if not image_tag:
+                raise Exception("Failed to build Docker image")
+            
+            # Create container
+            await processing_msg.edit_text("📦 Creating container...")
+            container_id = await deployment.create_container(bot_name, image_tag, bot_token)
+            if not container_id:
+                raise Exception("Failed to create Docker container")
+            
+            # Start container
+            await processing_msg.edit_text("🚀 Starting bot...")
+            started = await deployment.start_container(container_id)
+            if not started:
+                raise Exception("Failed to start container")
+            
+            # Register bot
+            await registry.register_bot(user_id, bot_name, bot_token, container_id, "running")
+            
+            # Success message
+            overview = format_bot_overview(bot_name, requirements, architecture)
+            safe_bot_name = escape_markdown(bot_name)
+            success_msg = (
+                f"{overview}\n\n"
+                f"✅ **Bot deployed successfully!**\n\n"
+                f"Your bot is now running. You can interact with it using the token you provided.\n\n"
+                f"**Bot Name:** `{safe_bot_name}`\n"
+                f"**Status:** Running\n"
+                f"**Container ID:** `{container_id[:12]}`\n\n"
+                f"Use `/list` to see all your bots or `/status {safe_bot_name}` to check status."
+            )
+            
+            await processing_msg.edit_text(success_msg)
         
     except Exception as e:
         error_msg = format_error_message(f"Failed to create bot: {str(e)}")
-        await processing_msg.edit_text(error_msg, parse_mode="Markdown")
+        await processing_msg.edit_text(error_msg)
+    finally:
+        # Never leave the user stuck in waiting_token, even if a reply fails
         await state.clear()
@@ -3,13 +3,7 @@
 from aiogram import Router, types
 from aiogram.filters import Command
 
-router = Router()
-
-
-@router.message(Command("help"))
-async def handler(message: types.Message):
-    """Handle /help command."""
-    help_text = """📖 **BotBuilder Help**
+_HELP_TEXT = """📖 **BotBuilder Help**
 
 **Commands:**
 • `/start` - Welcome message and introduction
@@ -45,4 +39,11 @@ If you encounter any issues, make sure:
 
 Happy bot building! 🎉
 """
-    await message.answer(help_text, parse_mode="Markdown")
+
+router = Router()
+
+
+@router.message(Command("help"))
+async def handler(message: types.Message):
+    """Handle /help command."""
+    await message.answer(_HELP_TEXT)
@@ -6,17 +6,16 @@ from services.registry import BotRegistry
 from utils.formatters import format_bot_list
 
 router = Router()
-registry = BotRegistry()
 
 
 @router.message(Command("list"))
-async def handler(message: types.Message):
+async def handler(message: types.Message, registry: BotRegistry):
     """Handle /list command."""
     user_id = message.from_user.id
     
     try:
         bots = await registry.get_user_bots(user_id)
         response = format_bot_list(bots)
-        await message.answer(response, parse_mode="Markdown")
+        await message.answer(response)
     except Exception as e:
         await message.answer(f"❌ Error listing bots: {str(e)}")
@@ -3,13 +3,7 @@
 from aiogram import Router, types
 from aiogram.filters import Command
 
-router = Router()
-
-
-@router.message(Command("start"))
-async def handler(message: types.Message):
-    """Handle /start command."""
-    welcome_text = """👋 **Welcome to BotBuilder!**
+_WELCOME_TEXT = """👋 **Welcome to BotBuilder!**
 
 I'm an expert Telegram Bot Architect. I can create and deploy complete Telegram bots for you automatically.
 
@@ -33,4 +27,11 @@ Then describe: "I want an expense tracker bot with categories"
 
 Ready to create your first bot? Use `/create` to get started! 🚀
 """
-    await message.answer(welcome_text, parse_mode="Markdown")
+
+router = Router()
+
+
+@router.message(Command("start"))
+async def handler(message: types.Message):
+    """Handle /start command."""
+    await message.answer(_WELCOME_TEXT)
@@ -1,28 +1,29 @@
 """Start bot command handler for BotBuilder."""
 
 from aiogram import Router, types
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from services.registry import BotRegistry
 from services.deployment import DeploymentService
 from utils.formatters import format_success_message, format_error_message
 
 router = Router()
-registry = BotRegistry()
-deployment = DeploymentService()
 
 
 @router.message(Command("start_bot"))
-async def handler(message: types.Message):
+async def handler(
+    message: types.Message,
+    command: CommandObject,
+    registry: BotRegistry,
+    deployment: DeploymentService
+):
     """Handle /start_bot command."""
     user_id = message.from_user.id
-    args = message.text.split()[1:] if message.text else []
+    bot_name = command.args.split(maxsplit=1)[0] if command.args else None
     
-    if not args:
-        await message.answer("❌ Please provide a bot name: `/start_bot <bot_name>`", parse_mode="Markdown")
+    if not bot_name:
+        await message.answer("❌ Please provide a bot name: `/start_bot <bot_name>`")
         return
     
-    bot_name = args[0]
-    
     try:
         # Get bot metadata
         bot = await registry.get_bot(user_id, bot_name)
@@ -36,7 +37,7 @@ async def handler(message: types.Message):
             return
         
         # Start container
-        success = deployment.start_container(container_id)
+        success = await deployment.start_container(container_id)
         if success:
             await registry.update_bot_status(user_id, bot_name, "running")
             await message.answer(format_success_message(f"Bot '{bot_name}' started successfully."))
@@ -1,28 +1,29 @@
 """Status command handler for BotBuilder."""
 
 from aiogram import Router, types
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from services.registry import BotRegistry
 from services.deployment import DeploymentService
 from utils.formatters import format_deployment_status, format_error_message
 
 router = Router()
-registry = BotRegistry()
-deployment = DeploymentService()
 
 
 @router.message(Command("status"))
-async def handler(message: types.Message):
+async def handler(
+    message: types.Message,
+    command: CommandObject,
+    registry: BotRegistry,
+    deployment: DeploymentService
+):
     """Handle /status command."""
     user_id = message.from_user.id
-    args = message.text.split()[1:] if message.text else []
+    bot_name = command.args.split(maxsplit=1)[0] if command.args else None
     
-    if not args:
-        await message.answer("❌ Please provide a bot name: `/status <bot_name>`", parse_mode="Markdown")
+    if not bot_name:
+        await message.answer("❌ Please provide a bot name: `/status <bot_name>`")
         return
     
-    bot_name = args[0]
-    
     try:
         # Get bot metadata
         bot = await registry.get_bot(user_id, bot_name)
@@ -35,7 +36,7 @@ async def handler(message: types.Message):
         
         # Get actual container status
         if container_id:
-            actual_status = deployment.get_container_status(container_id)
+            actual_status = await deployment.get_container_status(container_id)
             if actual_status:
                 status = actual_status
                 # Update registry if status changed
@@ -43,6 +44,6 @@ async def handler(message: types.Message):
                     await registry.update_bot_status(user_id, bot_name, actual_status)
         
         response = format_deployment_status(bot_name, status, container_id)
-        await message.answer(response, parse_mode="Markdown")
+        await message.answer(response)
     except Exception as e:
         await message.answer(format_error_message(str(e)))
@@ -7,8 +7,10 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
-from config import BOT_TOKEN
+from config import BOT_TOKEN, REDIS_URL
 from handlers import start, help, create_bot, list_bots, stop_bot, start_bot, status
+from services.deployment import DeploymentService
+from services.registry import BotRegistry
 
 # Configure logging
 logging.basicConfig(
@@ -27,17 +29,27 @@ async def main():
         token=BOT_TOKEN,
         default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN)
     )
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    if REDIS_URL:
+        from aiogram.fsm.storage.redis import RedisStorage
+        storage = RedisStorage.from_url(REDIS_URL)
+    else:
+        storage = MemoryStorage()
+    
+    # Shared services, injected into handlers by name
+    registry = BotRegistry()
+    deployment = DeploymentService()
+    dp = Dispatcher(storage=storage, registry=registry, deployment=deployment)
     
     # Register handlers
-    dp.include_router(start.router)
-    dp.include_router(help.router)
-    dp.include_router(create_bot.router)
-    dp.include_router(list_bots.router)
-    dp.include_router(stop_bot.router)
-    dp.include_router(start_bot.router)
-    dp.include_router(status.router)
+    dp.include_routers(
+        start.router,
+        help.router,
+        create_bot.router,
+        list_bots.router,
+        stop_bot.router,
+        start_bot.router,
+        status.router,
+    )
     
     logger.info("BotBuilder bot is running...")
     
@@ -47,6 +59,9 @@ async def main():
     except Exception as e:
         logger.error(f"Error in bot: {e}", exc_info=True)
     finally:
+        await registry.close()
+        deployment.close()
+        await storage.close()
         await bot.session.close()
         logger.info("BotBuilder bot stopped.")
 
@@ -5,6 +5,9 @@ from dataclasses import dataclass
 
 from services.parser import BotRequirements
 
+# Packages every generated Python bot needs; also baked into the base image
+PYTHON_BASE_DEPENDENCIES = ("aiogram>=3.0.0", "python-dotenv>=1.0.0")
+
 
 @dataclass
 class BotArchitecture:
@@ -20,6 +23,65 @@ class BotArchitecture:
 class ArchitectureAnalyzer:
     """Analyze requirements and design bot architecture."""
     
+    # Command name -> handler implementing it
+    _CMD_MAP = {
+        "add": "add",
+        "create": "add",
+        "list": "list",
+        "show": "list",
+        "delete": "delete",
+        "remove": "delete",
+        "update": "update",
+        "edit": "update",
+        "search": "search",
+        "find": "search",
+    }
+    
+    # Feature -> dedicated handler
+    _FEATURE_HANDLERS = {
+        "tracking": "track",
+        "reminder": "reminder",
+        "export": "export",
+    }
+    
+    # (predicate, service) pairs, in generation order
+    _SERVICE_RULES = (
+        (lambda req: req.needs_database, "database"),
+        (lambda req: req.needs_payments, "payment"),
+        (lambda req: req.needs_api, "api_client"),
+        (lambda req: "export" in req.features, "exporter"),
+        (lambda req: "reminder" in req.features, "scheduler"),
+    )
+    
+    _BASE_MIDDLEWARE = ("logging", "error_handler")
+    _MIDDLEWARE_RULES = (
+        (lambda req: req.needs_database, "db_session"),
+    )
+    
+    # Per-language base packages and (predicate, package) pairs
+    _BASE_DEPENDENCIES = {
+        "python": PYTHON_BASE_DEPENDENCIES,
+        "nodejs": ("telegraf", "dotenv"),
+    }
+    _DEPENDENCY_RULES = {
+        "python": (
+            (lambda req: req.needs_database, "aiosqlite>=0.19.0"),
+            (lambda req: req.needs_api, "aiohttp>=3.9.0"),
+            (lambda req: "export" in req.features, "pandas>=2.0.0"),
+        ),
+        "nodejs": (
+            (lambda req: req.needs_database, "better-sqlite3"),
+            (lambda req: req.needs_api, "axios"),
+            (lambda req: "export" in req.features, "csv-writer"),
+        ),
+    }
+    
+    _CONFIG_VAR_RULES = (
+        (lambda req: req.needs_database, ("DATABASE_URL",)),
+        (lambda req: req.needs_payments, ("PAYMENT_PROVIDER", "PAYMENT_API_KEY")),
+        (lambda req: req.needs_api, ("API_KEY",)),
+    )
+    
     def analyze(self, requirements: BotRequirements) -> BotArchitecture:
         """Design bot architecture based on requirements."""
         handlers = self._design_handlers(requirements)
@@ -40,86 +102,37 @@ class ArchitectureAnalyzer:
     
     def _design_handlers(self, req: BotRequirements) -> List[str]:
         """Design handler structure."""
-        handlers = ["start", "help"]  # Always include
+        # Insertion-ordered set so the generated file layout is deterministic
+        handlers = dict.fromkeys(["start", "help"])  # Always include
         
         # Add handlers based on commands
-        command_handlers = {
-            "add": "add",
-            "create": "add",
-            "list": "list",
-            "show": "list",
-            "delete": "delete",
-            "remove": "delete",
-            "update": "update",
-            "edit": "update",
-            "search": "search",
-            "find": "search",
-        }
-        
         for cmd in req.commands:
-            cmd_lower = cmd.lower().strip('/')
-            if cmd_lower in command_handlers:
-                handler = command_handlers[cmd_lower]
-                if handler not in handlers:
-                    handlers.append(handler)
+            handler = self._CMD_MAP.get(cmd.lower().strip('/'))
+            if handler:
+                handlers[handler] = None
         
         # Add feature-specific handlers
-        if "tracking" in req.features:
-            handlers.append("track")
-        if "reminder" in req.features:
-            handlers.append("reminder")
-        if "export" in req.features:
-            handlers.append("export")
+        for feature, handler in self._FEATURE_HANDLERS.items():
+            if feature in req.features:
+                handlers[handler] = None
         
-        return list(set(handlers))
+        return list(handlers)
     
     def _design_services(self, req: BotRequirements) -> List[str]:
         """Design service structure."""
-        services = []
-        
-        if req.needs_database:
-            services.append("database")
-        if req.needs_payments:
-            services.append("payment")
-        if req.needs_api:
-            services.append("api_client")
-        if "export" in req.features:
-            services.append("exporter")
-        if "reminder" in req.features:
-            services.append("scheduler")
-        
-        return services
+        return [service for applies, service in self._SERVICE_RULES if applies(req)]
     
     def _design_middleware(self, req: BotRequirements) -> List[str]:
         """Design middleware structure."""
-        middleware = ["logging", "error_handler"]
-        
-        if req.needs_database:
-            middleware.append("db_session")
-        
+        middleware = list(self._BASE_MIDDLEWARE)
+        middleware.extend(item for applies, item in self._MIDDLEWARE_RULES if applies(req))
         return middleware
     
     def _design_dependencies(self, req: BotRequirements) -> List[str]:
         """Design dependency list."""
-        deps = []
-        
-        if req.language == "python":
-            deps.extend(["aiogram>=3.0.0", "python-dotenv>=1.0.0"])
-            if req.needs_database:
-                deps.append("aiosqlite>=0.19.0")
-            if req.needs_api:
-                deps.append("aiohttp>=3.9.0")
-            if "export" in req.features:
-                deps.append("pandas>=2.0.0")
-        else:  # nodejs
-            deps.extend(["telegraf", "dotenv"])
-            if req.needs_database:
-                deps.append("better-sqlite3")
-            if req.needs_api:
-                deps.append("axios")
-            if "export" in req.features:
-                deps.append("csv-writer")
-        
+        language = "python" if req.language == "python" else "nodejs"
+        deps = list(self._BASE_DEPENDENCIES[language])
+        deps.extend(dep for applies, dep in self._DEPENDENCY_RULES[language] if applies(req))
         return deps
     
     def _design_file_structure(
@@ -143,12 +156,7 @@ class ArchitectureAnalyzer:
     def _design_config_vars(self, req: BotRequirements) -> List[str]:
         """Design configuration variables."""
         vars = ["BOT_TOKEN"]
-        
-        if req.needs_database:
-            vars.append("DATABASE_URL")
-        if req.needs_payments:
-            vars.extend(["PAYMENT_PROVIDER", "PAYMENT_API_KEY"])
-        if req.needs_api:
-            vars.append("API_KEY")
-        
+        for applies, names in self._CONFIG_VAR_RULES:
+            if applies(req):
+                vars.extend(names)
         return vars
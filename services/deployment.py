@@ -1,22 +1,54 @@
 """Docker deployment service for bots."""
 
+import asyncio
+import hashlib
+import io
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 import docker
-from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 import logging
 
-from config import BOTS_DIR, DOCKER_NETWORK
+from config import BOTS_DIR, DOCKER_NETWORK, BASE_IMAGE, BASE_DOCKERFILE, NODEJS_BASE_IMAGE, BUILD_CONCURRENCY
+from services.analyzer import PYTHON_BASE_DEPENDENCIES
 
 logger = logging.getLogger(__name__)
 
 
+def base_image_for(language: str) -> str:
+    """Get the base image a generated bot's Dockerfile builds from."""
+    return BASE_IMAGE if language == "python" else NODEJS_BASE_IMAGE
+
+
 class DeploymentService:
-    """Manages Docker deployment of bots."""
+    """Manages Docker deployment of bots.
+    
+    docker-py is blocking, so every daemon call is pushed to a worker
+    thread to keep the dispatcher's event loop responsive. Image builds
+    get their own small pool so they cannot starve the default executor
+    that the lighter Docker calls and file writes share.
+    """
+    
+    # Seconds a container lookup may be served from cache
+    CACHE_TTL = 2.0
+    
+    # Image label holding the digest of the base image's build context
+    BASE_DIGEST_LABEL = "botbuilder.base-digest"
     
     def __init__(self):
+        self._status_cache: Dict[str, Tuple[float, str]] = {}
+        self._name_cache: Dict[str, Tuple[float, str]] = {}
+        self._build_executor = ThreadPoolExecutor(
+            max_workers=BUILD_CONCURRENCY,
+            thread_name_prefix="dockerbuild"
+        )
+        # Keeps concurrent /create calls from building the base image twice
+        self._base_image_lock = asyncio.Lock()
         try:
             self.client = docker.from_env()
             self._ensure_network()
+            self._ensure_base_image()
         except docker.errors.DockerException as e:
             logger.error(f"Failed to connect to Docker: {e}")
             raise
@@ -31,17 +63,126 @@ class DeploymentService:
                 driver="bridge"
             )
     
-    def build_image(self, bot_name: str, bot_dir: Path) -> Optional[str]:
-        """Build Docker image for a bot."""
+    @staticmethod
+    def _base_image_context() -> Tuple[bytes, str]:
+        """Pack the base image's build context and compute its digest."""
+        members = {
+            "Dockerfile": BASE_DOCKERFILE.read_bytes(),
+            "requirements.txt": "".join(f"{dep}\n" for dep in PYTHON_BASE_DEPENDENCIES).encode('utf-8'),
+        }
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as tf:
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tf.addfile(info, io.BytesIO(data))
+        context = buf.getvalue()
+        return context, hashlib.sha256(context).hexdigest()
+    
+    def _ensure_base_image(self) -> bool:
+        """Ensure the shared base image for Python bots exists and is current.
+        
+        An image we built is rebuilt when Dockerfile.base or the base
+        dependencies change; a BASE_IMAGE without our label is left alone.
+        """
+        context, digest = self._base_image_context()
+        try:
+            image = self.client.images.get(BASE_IMAGE)
+            if image.labels.get(self.BASE_DIGEST_LABEL, digest) == digest:
+                return True
+            logger.info(f"Base image {BASE_IMAGE} is out of date, rebuilding...")
+        except docker.errors.ImageNotFound:
+            logger.info(f"Building base image {BASE_IMAGE}...")
+        
+        try:
+            self.client.images.build(
+                fileobj=io.BytesIO(context),
+                custom_context=True,
+                tag=BASE_IMAGE,
+                rm=True,
+                labels={self.BASE_DIGEST_LABEL: digest}
+            )
+            return True
+        except (docker.errors.BuildError, docker.errors.APIError) as e:
+            logger.error(f"Failed to build base image {BASE_IMAGE}: {e}")
+            return False
+    
+    def close(self):
+        """Release the build pool and the Docker client."""
+        self._build_executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
+    
+    def _cache_get(self, cache: Dict[str, Tuple[float, str]], key: str) -> Optional[str]:
+        """Return a cached value if it is still fresh."""
+        entry = cache.get(key)
+        if entry and time.monotonic() - entry[0] < self.CACHE_TTL:
+            return entry[1]
+        return None
+    
+    def invalidate(self, container_id: str):
+        """Drop cached status for a container after a state change."""
+        self._status_cache.pop(container_id, None)
+    
+    def prewarm(self, language: str) -> asyncio.Task:
+        """Start fetching a bot's base image in the background.
+        
+        Await the returned task before building so the build finds the
+        image locally instead of pulling it on the critical path. The task
+        yields False if the image is still unavailable.
+        """
+        return asyncio.create_task(self._pull_image(base_image_for(language)))
+    
+    async def _pull_image(self, image: str) -> bool:
+        """Pull an image unless it is already present locally."""
+        try:
+            await asyncio.to_thread(self.client.images.get, image)
+            return True
+        except docker.errors.ImageNotFound:
+            pass
+        except Exception as e:
+            logger.error(f"Error checking image {image}: {e}")
+            return False
+        
+        # The shared base image is built locally, never pulled; retry the
+        # build here so a failure at startup doesn't last until a restart
+        if image == BASE_IMAGE:
+            async with self._base_image_lock:
+                return await asyncio.to_thread(self._ensure_base_image)
+        
+        try:
+            logger.info(f"Pulling image {image}...")
+            await asyncio.to_thread(self.client.images.pull, image)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to pull image {image}: {e}")
+            return False
+    
+    def _build_sync(self, image_tag: str, archive: bytes):
+        """Build an image from a bot's source archive (runs on the build pool)."""
+        return self.client.images.build(
+            fileobj=io.BytesIO(archive),
+            custom_context=True,
+            tag=image_tag,
+            rm=True,
+            forcerm=True
+        )
+    
+    async def build_image(self, bot_name: str, archive: bytes) -> Optional[str]:
+        """Build Docker image for a bot from its generated source archive.
+        
+        The archive is sent as the build context straight from memory, so
+        the bot directory on disk is never read back or re-tarred.
+        """
         try:
             image_tag = f"botbuilder-{bot_name}:latest"
             
             logger.info(f"Building Docker image for {bot_name}...")
-            image, build_logs = self.client.images.build(
-                path=str(bot_dir),
-                tag=image_tag,
-                rm=True,
-                forcerm=True
+            loop = asyncio.get_running_loop()
+            image, build_logs = await loop.run_in_executor(
+                self._build_executor,
+                self._build_sync,
+                image_tag,
+                archive
             )
             
             logger.info(f"Successfully built image {image_tag}")
@@ -53,7 +194,7 @@ class DeploymentService:
             logger.error(f"Unexpected error building {bot_name}: {e}")
             return None
     
-    def create_container(
+    async def create_container(
         self,
         bot_name: str,
         image_tag: str,
@@ -73,13 +214,16 @@ class DeploymentService:
             
             # Check if container already exists
             try:
-                existing = self.client.containers.get(container_name)
-                existing.remove(force=True)
+                existing = await asyncio.to_thread(self.client.containers.get, container_name)
+                await asyncio.to_thread(existing.remove, force=True)
+                self.invalidate(existing.id)
             except docker.errors.NotFound:
                 pass
+            self._name_cache.pop(bot_name, None)
             
             logger.info(f"Creating container {container_name}...")
-            container = self.client.containers.create(
+            container = await asyncio.to_thread(
+                self.client.containers.create,
                 image=image_tag,
                 name=container_name,
                 environment=environment,
@@ -97,11 +241,12 @@ class DeploymentService:
             logger.error(f"Unexpected error creating container for {bot_name}: {e}")
             return None
     
-    def start_container(self, container_id: str) -> bool:
+    async def start_container(self, container_id: str) -> bool:
         """Start a Docker container."""
         try:
-            container = self.client.containers.get(container_id)
-            container.start()
+            container = await asyncio.to_thread(self.client.containers.get, container_id)
+            await asyncio.to_thread(container.start)
+            self.invalidate(container_id)
             logger.info(f"Started container {container_id}")
             return True
         except docker.errors.APIError as e:
@@ -111,11 +256,12 @@ class DeploymentService:
             logger.error(f"Unexpected error starting container {container_id}: {e}")
             return False
     
-    def stop_container(self, container_id: str) -> bool:
+    async def stop_container(self, container_id: str) -> bool:
         """Stop a Docker container."""
         try:
-            container = self.client.containers.get(container_id)
-            container.stop()
+            container = await asyncio.to_thread(self.client.containers.get, container_id)
+            await asyncio.to_thread(container.stop)
+            self.invalidate(container_id)
             logger.info(f"Stopped container {container_id}")
             return True
         except docker.errors.APIError as e:
@@ -125,10 +271,14 @@ class DeploymentService:
             logger.error(f"Unexpected error stopping container {container_id}: {e}")
             return False
     
-    def get_container_status(self, container_id: str) -> Optional[str]:
+    async def get_container_status(self, container_id: str) -> Optional[str]:
         """Get container status."""
+        cached = self._cache_get(self._status_cache, container_id)
+        if cached is not None:
+            return cached
         try:
-            container = self.client.containers.get(container_id)
+            container = await asyncio.to_thread(self.client.containers.get, container_id)
+            self._status_cache[container_id] = (time.monotonic(), container.status)
             return container.status
         except docker.errors.NotFound:
             return None
@@ -136,23 +286,27 @@ class DeploymentService:
             logger.error(f"Error getting container status {container_id}: {e}")
             return None
     
-    def get_container_logs(self, container_id: str, tail: int = 50) -> Optional[str]:
+    async def get_container_logs(self, container_id: str, tail: int = 50) -> Optional[str]:
         """Get container logs."""
         try:
-            container = self.client.containers.get(container_id)
-            logs = container.logs(tail=tail).decode('utf-8')
-            return logs
+            container = await asyncio.to_thread(self.client.containers.get, container_id)
+            logs = await asyncio.to_thread(container.logs, tail=tail)
+            return logs.decode('utf-8')
         except docker.errors.NotFound:
             return None
         except Exception as e:
             logger.error(f"Error getting container logs {container_id}: {e}")
             return None
     
-    def find_container_by_name(self, bot_name: str) -> Optional[str]:
+    async def find_container_by_name(self, bot_name: str) -> Optional[str]:
         """Find container ID by bot name."""
+        cached = self._cache_get(self._name_cache, bot_name)
+        if cached is not None:
+            return cached
         try:
             container_name = f"botbuilder-{bot_name}"
-            container = self.client.containers.get(container_name)
+            container = await asyncio.to_thread(self.client.containers.get, container_name)
+            self._name_cache[bot_name] = (time.monotonic(), container.id)
             return container.id
         except docker.errors.NotFound:
             return None
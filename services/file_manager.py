@@ -1,8 +1,10 @@
 """File system management for generated bots."""
 
+import asyncio
+import io
+import tarfile
 from pathlib import Path
-from typing import Dict
-import aiofiles
+from typing import Iterable
 
 from config import BOTS_DIR
 
@@ -21,30 +23,31 @@ class FileManager:
     async def create_bot_directory(self, bot_name: str) -> Path:
         """Create directory structure for a bot."""
         bot_dir = self.get_bot_dir(bot_name)
-        bot_dir.mkdir(exist_ok=True)
         
-        # Create subdirectories
-        (bot_dir / "handlers").mkdir(exist_ok=True)
-        (bot_dir / "services").mkdir(exist_ok=True)
-        (bot_dir / "utils").mkdir(exist_ok=True)
+        # Create the bot directory and its subdirectories in one thread hop
+        await asyncio.to_thread(
+            self._make_dirs,
+            [bot_dir / "handlers", bot_dir / "services", bot_dir / "utils"]
+        )
         
         return bot_dir
     
-    async def write_file(self, file_path: Path, content: str):
-        """Write content to a file."""
-        # Ensure parent directory exists
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-            await f.write(content)
+    @staticmethod
+    def _make_dirs(dirs: Iterable[Path]):
+        """Create directories, including missing parents."""
+        for directory in dirs:
+            directory.mkdir(parents=True, exist_ok=True)
     
-    async def write_files(self, bot_name: str, files: Dict[str, str]):
-        """Write multiple files for a bot."""
-        bot_dir = self.get_bot_dir(bot_name)
-        
-        for file_path, content in files.items():
-            full_path = bot_dir / file_path
-            await self.write_file(full_path, content)
+    async def extract_archive(self, bot_name: str, archive: bytes):
+        """Write a bot's files from its generated source archive."""
+        await asyncio.to_thread(self._extract, self.get_bot_dir(bot_name), archive)
+    
+    @staticmethod
+    def _extract(bot_dir: Path, archive: bytes):
+        """Unpack a tar archive into the bot directory."""
+        with tarfile.open(fileobj=io.BytesIO(archive), mode="r") as tf:
+            # The data filter rejects absolute paths and members escaping bot_dir
+            tf.extractall(bot_dir, filter="data")
     
     def bot_exists(self, bot_name: str) -> bool:
         """Check if bot directory exists."""
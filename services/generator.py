@@ -1,12 +1,54 @@
 """Code generator for bot creation."""
 
+import io
+import tarfile
+import time
 from pathlib import Path
-from typing import Dict
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 
 from config import TEMPLATES_DIR, PYTHON_TEMPLATES_DIR, NODEJS_TEMPLATES_DIR, DOCKER_TEMPLATES_DIR
 from services.parser import BotRequirements
 from services.analyzer import BotArchitecture
+from services.deployment import base_image_for
+
+
+# Fallback sources for handlers and services that have no template
+_PY_HANDLER_FALLBACK = '''"""{handler} command handler."""
+
+from aiogram import Router, types
+from aiogram.filters import Command
+
+router = Router()
+
+
+@router.message(Command("{handler}"))
+async def handler(message: types.Message):
+    """Handle /{handler} command."""
+    await message.answer("Implement {handler} functionality here")
+'''.format
+
+_PY_SERVICE_FALLBACK = '''"""{service} service for {bot_name}."""
+
+# Implement {service} service logic here
+'''.format
+
+_JS_HANDLER_FALLBACK = '''const {{ Telegraf }} = require('telegraf');
+
+module.exports = (bot) => {{
+    bot.command('{handler}', (ctx) => {{
+        ctx.reply('Implement {handler} functionality here');
+    }});
+}};
+'''.format
+
+_JS_SERVICE_FALLBACK = '''// {service} service for {bot_name}
+
+// Implement {service} service logic here
+
+module.exports = {{}};
+'''.format
 
 
 class CodeGenerator:
@@ -15,8 +57,18 @@ class CodeGenerator:
     def __init__(self):
         self.env = Environment(
             loader=FileSystemLoader(str(TEMPLATES_DIR)),
-            autoescape=select_autoescape(['html', 'xml'])
+            # None of the templates produce HTML, and they don't change at runtime
+            autoescape=False,
+            auto_reload=False,
+            cache_size=400,
+            bytecode_cache=FileSystemBytecodeCache()
         )
+        # Compile every template once so generation is a dict lookup and
+        # a missing optional template is a membership test, not an exception
+        self._templates: Dict[str, Template] = {
+            name: self.env.get_template(name)
+            for name in self.env.list_templates(extensions=["j2"])
+        }
     
     def generate_bot(
         self,
@@ -24,213 +76,156 @@ class CodeGenerator:
         bot_token: str,
         requirements: BotRequirements,
         architecture: BotArchitecture
-    ) -> Dict[str, str]:
-        """Generate all bot files."""
+    ) -> Dict[str, bytes]:
+        """Generate all bot files as UTF-8 encoded contents."""
         files = {}
         
+        # One read-only context shared by every template render
+        context = MappingProxyType({
+            "bot_name": bot_name,
+            "bot_token": bot_token,
+            "requirements": requirements,
+            "architecture": architecture,
+            "commands": requirements.commands,
+            "features": requirements.features,
+            "language": requirements.language,
+            "dependencies": architecture.dependencies,
+            "config_vars": architecture.config_vars,
+            "base_image": base_image_for(requirements.language),
+        })
+        
         if requirements.language == "python":
-            files.update(self._generate_python_bot(bot_name, bot_token, requirements, architecture))
+            self._generate_python_bot(context, files)
         else:
-            files.update(self._generate_nodejs_bot(bot_name, bot_token, requirements, architecture))
+            self._generate_nodejs_bot(context, files)
         
         # Generate Docker files
-        files.update(self._generate_docker_files(bot_name, requirements, architecture))
+        self._generate_docker_files(context, files)
         
         # Generate config files
-        files.update(self._generate_config_files(bot_name, bot_token, requirements, architecture))
+        self._generate_config_files(context, files)
         
         return files
     
-    def _generate_python_bot(
+    def generate_bot_archive(
         self,
         bot_name: str,
         bot_token: str,
         requirements: BotRequirements,
         architecture: BotArchitecture
-    ) -> Dict[str, str]:
+    ) -> bytes:
+        """Generate all bot files packed into an uncompressed tar archive.
+        
+        The archive doubles as the Docker build context and as the source
+        for writing the bot directory, so neither side handles files one by one.
+        """
+        files = self.generate_bot(bot_name, bot_token, requirements, architecture)
+        
+        buf = io.BytesIO()
+        mtime = time.time()
+        with tarfile.open(fileobj=buf, mode="w") as tf:
+            for file_path, content in files.items():
+                info = tarfile.TarInfo(file_path)
+                info.size = len(content)
+                info.mtime = mtime
+                tf.addfile(info, io.BytesIO(content))
+        return buf.getvalue()
+    
+    def _generate_python_bot(self, context: Mapping[str, Any], files: Dict[str, bytes]):
         """Generate Python bot files."""
-        files = {}
-        
-        context = {
-            "bot_name": bot_name,
-            "bot_token": bot_token,
-            "requirements": requirements,
-            "architecture": architecture,
-            "commands": requirements.commands,
-            "features": requirements.features,
-        }
+        bot_name = context["bot_name"]
+        architecture = context["architecture"]
         
         # Main bot file
-        template = self.env.get_template("python/main.py.j2")
-        files["main.py"] = template.render(**context)
+        template = self._templates["python/main.py.j2"]
+        files["main.py"] = template.render(context).encode('utf-8')
         
         # Handlers
         for handler in architecture.handlers:
-            try:
-                template = self.env.get_template(f"python/handlers/{handler}.py.j2")
-                files[f"handlers/{handler}.py"] = template.render(**context)
-            except Exception as e:
+            name = f"python/handlers/{handler}.py.j2"
+            if name in self._templates:
+                files[f"handlers/{handler}.py"] = self._templates[name].render(context).encode('utf-8')
+            else:
                 # If template doesn't exist, create a basic handler
-                handler_code = f'''"""{{handler}} command handler."""
-
-from aiogram import Router, types
-from aiogram.filters import Command
-
-router = Router()
-
-
-@router.message(Command("{handler}"))
-async def handler(message: types.Message):
-    """Handle /{handler} command."""
-    await message.answer("Implement {handler} functionality here")
-'''
-                files[f"handlers/{handler}.py"] = handler_code
+                files[f"handlers/{handler}.py"] = _PY_HANDLER_FALLBACK(handler=handler).encode('utf-8')
         
         # Services
         for service in architecture.services:
-            try:
-                template = self.env.get_template(f"python/services/{service}.py.j2")
-                files[f"services/{service}.py"] = template.render(**context)
-            except Exception as e:
+            name = f"python/services/{service}.py.j2"
+            if name in self._templates:
+                files[f"services/{service}.py"] = self._templates[name].render(context).encode('utf-8')
+            else:
                 # If template doesn't exist, create a basic service
-                service_code = f'''"""{{service}} service for {bot_name}."""
-
-# Implement {service} service logic here
-'''
-                files[f"services/{service}.py"] = service_code
+                files[f"services/{service}.py"] = _PY_SERVICE_FALLBACK(service=service, bot_name=bot_name).encode('utf-8')
         
         # Requirements
-        template = self.env.get_template("python/requirements.txt.j2")
-        files["requirements.txt"] = template.render(**context)
+        template = self._templates["python/requirements.txt.j2"]
+        files["requirements.txt"] = template.render(context).encode('utf-8')
         
         # Handlers __init__.py
-        try:
-            handlers_init = self.env.get_template("python/handlers/__init__.py.j2")
-            files["handlers/__init__.py"] = handlers_init.render(**context)
-        except Exception:
+        name = "python/handlers/__init__.py.j2"
+        if name in self._templates:
+            files["handlers/__init__.py"] = self._templates[name].render(context).encode('utf-8')
+        else:
             # Fallback if template doesn't exist
-            files["handlers/__init__.py"] = "# Handlers package\n"
+            files["handlers/__init__.py"] = b"# Handlers package\n"
         
         # Services __init__.py (if services exist)
         if architecture.services:
-            try:
-                services_init = self.env.get_template("python/services/__init__.py.j2")
-                files["services/__init__.py"] = services_init.render(**context)
-            except Exception:
+            name = "python/services/__init__.py.j2"
+            if name in self._templates:
+                files["services/__init__.py"] = self._templates[name].render(context).encode('utf-8')
+            else:
                 # Fallback if template doesn't exist
-                files["services/__init__.py"] = "# Services package\n"
-        
-        return files
+                files["services/__init__.py"] = b"# Services package\n"
     
-    def _generate_nodejs_bot(
-        self,
-        bot_name: str,
-        bot_token: str,
-        requirements: BotRequirements,
-        architecture: BotArchitecture
-    ) -> Dict[str, str]:
+    def _generate_nodejs_bot(self, context: Mapping[str, Any], files: Dict[str, bytes]):
         """Generate Node.js bot files."""
-        files = {}
-        
-        context = {
-            "bot_name": bot_name,
-            "bot_token": bot_token,
-            "requirements": requirements,
-            "architecture": architecture,
-            "commands": requirements.commands,
-            "features": requirements.features,
-        }
+        bot_name = context["bot_name"]
+        architecture = context["architecture"]
         
         # Main bot file
-        template = self.env.get_template("nodejs/index.js.j2")
-        files["index.js"] = template.render(**context)
+        template = self._templates["nodejs/index.js.j2"]
+        files["index.js"] = template.render(context).encode('utf-8')
         
         # Handlers
         for handler in architecture.handlers:
-            try:
-                template = self.env.get_template(f"nodejs/handlers/{handler}.js.j2")
-                files[f"handlers/{handler}.js"] = template.render(**context)
-            except Exception as e:
+            name = f"nodejs/handlers/{handler}.js.j2"
+            if name in self._templates:
+                files[f"handlers/{handler}.js"] = self._templates[name].render(context).encode('utf-8')
+            else:
                 # If template doesn't exist, create a basic handler
-                handler_code = f'''const {{ Telegraf }} = require('telegraf');
-
-module.exports = (bot) => {{
-    bot.command('{handler}', (ctx) => {{
-        ctx.reply('Implement {handler} functionality here');
-    }});
-}};
-'''
-                files[f"handlers/{handler}.js"] = handler_code
+                files[f"handlers/{handler}.js"] = _JS_HANDLER_FALLBACK(handler=handler).encode('utf-8')
         
         # Services
         for service in architecture.services:
-            try:
-                template = self.env.get_template(f"nodejs/services/{service}.js.j2")
-                files[f"services/{service}.js"] = template.render(**context)
-            except Exception as e:
+            name = f"nodejs/services/{service}.js.j2"
+            if name in self._templates:
+                files[f"services/{service}.js"] = self._templates[name].render(context).encode('utf-8')
+            else:
                 # If template doesn't exist, create a basic service
-                service_code = f'''// {service} service for {bot_name}
-
-// Implement {service} service logic here
-
-module.exports = {{}};
-'''
-                files[f"services/{service}.js"] = service_code
+                files[f"services/{service}.js"] = _JS_SERVICE_FALLBACK(service=service, bot_name=bot_name).encode('utf-8')
         
         # Package.json
-        template = self.env.get_template("nodejs/package.json.j2")
-        files["package.json"] = template.render(**context)
-        
-        return files
+        template = self._templates["nodejs/package.json.j2"]
+        files["package.json"] = template.render(context).encode('utf-8')
     
-    def _generate_docker_files(
-        self,
-        bot_name: str,
-        requirements: BotRequirements,
-        architecture: BotArchitecture
-    ) -> Dict[str, str]:
+    def _generate_docker_files(self, context: Mapping[str, Any], files: Dict[str, bytes]):
         """Generate Docker files."""
-        files = {}
-        
-        context = {
-            "bot_name": bot_name,
-            "language": requirements.language,
-            "dependencies": architecture.dependencies,
-        }
-        
-        if requirements.language == "python":
-            template = self.env.get_template("docker/Dockerfile.python.j2")
-            files["Dockerfile"] = template.render(**context)
+        if context["language"] == "python":
+            template = self._templates["docker/Dockerfile.python.j2"]
+            files["Dockerfile"] = template.render(context).encode('utf-8')
         else:
-            template = self.env.get_template("docker/Dockerfile.nodejs.j2")
-            files["Dockerfile"] = template.render(**context)
-        
-        return files
+            template = self._templates["docker/Dockerfile.nodejs.j2"]
+            files["Dockerfile"] = template.render(context).encode('utf-8')
     
-    def _generate_config_files(
-        self,
-        bot_name: str,
-        bot_token: str,
-        requirements: BotRequirements,
-        architecture: BotArchitecture
-    ) -> Dict[str, str]:
+    def _generate_config_files(self, context: Mapping[str, Any], files: Dict[str, bytes]):
         """Generate configuration files."""
-        files = {}
-        
-        context = {
-            "bot_name": bot_name,
-            "config_vars": architecture.config_vars,
-        }
-        
         # .env.example
-        template = self.env.get_template("env.example.j2")
-        files[".env.example"] = template.render(**context)
+        template = self._templates["env.example.j2"]
+        files[".env.example"] = template.render(context).encode('utf-8')
         
         # .env (with actual token)
-        env_content = f"BOT_TOKEN={bot_token}\n"
-        for var in architecture.config_vars:
-            if var != "BOT_TOKEN":
-                env_content += f"{var}=\n"
-        files[".env"] = env_content
-        
-        return files
+        parts = [f"BOT_TOKEN={context['bot_token']}"]
+        parts.extend(f"{var}=" for var in context["config_vars"] if var != "BOT_TOKEN")
+        files[".env"] = ("\n".join(parts) + "\n").encode('utf-8')
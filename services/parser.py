@@ -1,23 +1,51 @@
 """Parse user requirements from natural language descriptions."""
 
 import re
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True)
 class BotRequirements:
     """Structured bot requirements."""
     purpose: str
-    features: List[str]
-    commands: List[str]
-    integrations: List[str]
+    features: Tuple[str, ...]
+    commands: Tuple[str, ...]
+    integrations: Tuple[str, ...]
     language: str  # "python" or "nodejs"
     needs_database: bool
     needs_payments: bool
     needs_api: bool
 
 
+def _index_keywords(*tables: Tuple[str, Dict[str, List[str]]]) -> Dict[str, Set[Tuple[str, str]]]:
+    """Map each keyword to the (kind, name) labels it signals."""
+    index: Dict[str, Set[Tuple[str, str]]] = {}
+    for kind, table in tables:
+        for name, keywords in table.items():
+            for keyword in keywords:
+                index.setdefault(keyword, set()).add((kind, name))
+    
+    # Only the longest keyword is reported at each position, so a keyword
+    # also signals the labels of any keyword it starts with
+    for keyword, labels in index.items():
+        for other, other_labels in index.items():
+            if other != keyword and keyword.startswith(other):
+                labels |= other_labels
+    return index
+
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    """Compile keywords into one pattern that finds them as substrings.
+    
+    The zero-width lookahead lets matches overlap, so a keyword is still
+    found when it starts inside another one.
+    """
+    alternation = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(f"(?=({alternation}))")
+
+
 class RequirementParser:
     """Parse natural language bot descriptions into structured requirements."""
     
@@ -39,23 +67,65 @@ class RequirementParser:
         r"(\w+)\s+command",  # add command
     ]
     
+    # Features inferred from common verbs
+    CONTEXT_FEATURES = {
+        "tracking": ["track", "log"],
+        "listing": ["list", "show"],
+        "creation": ["add", "create"],
+        "deletion": ["delete", "remove"],
+    }
+    
+    # Commands inferred from the description
+    INFERRED_COMMANDS = {
+        "/add": ["add", "create"],
+        "/list": ["list", "show"],
+        "/delete": ["delete", "remove"],
+        "/start": ["start"],
+        "/help": ["help"],
+    }
+    
+    # Words that select Node.js over the default Python
+    NODEJS_KEYWORDS = ["node", "nodejs", "javascript", "js", "telegraf"]
+    
+    # Compiled once; kept separate because their matches may overlap
+    _COMMAND_RES = [re.compile(pattern, re.IGNORECASE) for pattern in COMMAND_PATTERNS]
+    
+    _SENTENCE_END_RE = re.compile(r'[.!?]\s+')
+    
+    # Every keyword above in one pattern, so a single sweep of the
+    # description yields all features, inferred commands and language
+    _KEYWORD_LABELS = _index_keywords(
+        ("feature", FEATURE_KEYWORDS),
+        ("context", CONTEXT_FEATURES),
+        ("command", INFERRED_COMMANDS),
+        ("language", {"nodejs": NODEJS_KEYWORDS}),
+    )
+    _KEYWORD_RE = _keyword_pattern(_KEYWORD_LABELS)
+    
     def parse(self, description: str) -> BotRequirements:
         """Parse bot description into structured requirements."""
+        return _parse_cached(description)
+    
+    def _parse(self, description: str) -> BotRequirements:
+        """Parse a description without consulting the cache."""
         description_lower = description.lower()
         
         # Extract purpose (first sentence or main description)
         purpose = self._extract_purpose(description)
         
+        # Find all keywords in one pass
+        labels = self._scan_keywords(description_lower)
+        
         # Extract features
-        features = self._extract_features(description_lower)
+        features = self._extract_features(labels)
         
         # Extract commands
-        commands = self._extract_commands(description)
+        commands = self._extract_commands(description, labels)
         
         # Detect integrations
-        needs_database = self._has_feature(description_lower, "database")
-        needs_payments = self._has_feature(description_lower, "payments")
-        needs_api = self._has_feature(description_lower, "api")
+        needs_database = ("feature", "database") in labels
+        needs_payments = ("feature", "payments") in labels
+        needs_api = ("feature", "api") in labels
         
         integrations = []
         if needs_database:
@@ -66,13 +136,13 @@ class RequirementParser:
             integrations.append("api")
         
         # Detect language preference (default to Python)
-        language = self._detect_language(description_lower)
+        language = self._detect_language(labels)
         
         return BotRequirements(
             purpose=purpose,
-            features=features,
-            commands=commands,
-            integrations=integrations,
+            features=tuple(features),
+            commands=tuple(commands),
+            integrations=tuple(integrations),
             language=language,
             needs_database=needs_database,
             needs_payments=needs_payments,
@@ -82,7 +152,7 @@ class RequirementParser:
     def _extract_purpose(self, description: str) -> str:
         """Extract bot purpose from description."""
         # Take first sentence or first 200 characters
-        sentences = re.split(r'[.!?]\s+', description)
+        sentences = self._SENTENCE_END_RE.split(description)
         if sentences:
             purpose = sentences[0].strip()
             if len(purpose) > 200:
@@ -90,61 +160,51 @@ class RequirementParser:
             return purpose
         return description[:200] if len(description) > 200 else description
     
-    def _extract_features(self, description_lower: str) -> List[str]:
+    def _scan_keywords(self, description_lower: str) -> Set[Tuple[str, str]]:
+        """Collect the labels of every keyword in the description."""
+        labels = set()
+        for keyword in set(self._KEYWORD_RE.findall(description_lower)):
+            labels |= self._KEYWORD_LABELS[keyword]
+        return labels
+    
+    def _extract_features(self, labels: Set[Tuple[str, str]]) -> List[str]:
         """Extract features from description."""
-        features = []
-        
-        for feature, keywords in self.FEATURE_KEYWORDS.items():
-            if any(keyword in description_lower for keyword in keywords):
-                features.append(feature)
+        features = [feature for feature in self.FEATURE_KEYWORDS if ("feature", feature) in labels]
         
         # Add common features based on context
-        if "track" in description_lower or "log" in description_lower:
-            features.append("tracking")
-        if "list" in description_lower or "show" in description_lower:
-            features.append("listing")
-        if "add" in description_lower or "create" in description_lower:
-            features.append("creation")
-        if "delete" in description_lower or "remove" in description_lower:
-            features.append("deletion")
+        features.extend(feature for feature in self.CONTEXT_FEATURES if ("context", feature) in labels)
         
-        return list(set(features))  # Remove duplicates
+        return list(dict.fromkeys(features))  # Remove duplicates, keep order
     
-    def _extract_commands(self, description: str) -> List[str]:
+    def _extract_commands(self, description: str, labels: Set[Tuple[str, str]]) -> List[str]:
         """Extract commands from description."""
         commands = []
         
         # Find explicit command mentions
-        for pattern in self.COMMAND_PATTERNS:
-            matches = re.findall(pattern, description, re.IGNORECASE)
-            commands.extend(matches)
+        for pattern in self._COMMAND_RES:
+            commands.extend(pattern.findall(description))
         
         # Infer common commands from features
-        description_lower = description.lower()
-        if "add" in description_lower or "create" in description_lower:
-            commands.append("/add")
-        if "list" in description_lower or "show" in description_lower:
-            commands.append("/list")
-        if "delete" in description_lower or "remove" in description_lower:
-            commands.append("/delete")
-        if "start" in description_lower:
-            commands.append("/start")
-        if "help" in description_lower:
-            commands.append("/help")
+        commands.extend(cmd for cmd in self.INFERRED_COMMANDS if ("command", cmd) in labels)
         
         # Clean and deduplicate
         commands = [cmd.strip('/') if cmd.startswith('/') else cmd for cmd in commands]
-        commands = list(set(commands))
+        commands = list(dict.fromkeys(commands))
         
         return commands[:10]  # Limit to 10 commands
     
-    def _has_feature(self, description_lower: str, feature: str) -> bool:
-        """Check if description mentions a specific feature."""
-        keywords = self.FEATURE_KEYWORDS.get(feature, [])
-        return any(keyword in description_lower for keyword in keywords)
-    
-    def _detect_language(self, description_lower: str) -> str:
+    def _detect_language(self, labels: Set[Tuple[str, str]]) -> str:
         """Detect preferred language (default: python)."""
-        if any(word in description_lower for word in ["node", "nodejs", "javascript", "js", "telegraf"]):
+        if ("language", "nodejs") in labels:
             return "nodejs"
         return "python"  # Default to Python
+
+
+# Parsing is pure, so repeated descriptions (e.g. retried builds) reuse the
+# earlier result. Keyed on the description alone so the cache is shared by
+# every parser and keeps none of them alive; BotRequirements is frozen so
+# sharing a result is safe.
+@lru_cache(maxsize=256)
+def _parse_cached(description: str) -> BotRequirements:
+    """Parse a description, memoizing the result."""
+    return RequirementParser()._parse(description)
@@ -1,20 +1,67 @@
 """Bot registry for managing deployed bots metadata."""
 
+import asyncio
 import json
+import os
+import tempfile
 from pathlib import Path
-from typing import Dict, List, Optional
-from datetime import datetime
-import aiofiles
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timezone
 
 from config import REGISTRY_FILE
 
+try:
+    import orjson
+    
+    def _dumps(data: Dict) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    
+    _loads = orjson.loads
+except ImportError:
+    # Fall back to the stdlib encoder if orjson isn't installed
+    def _dumps(data: Dict) -> bytes:
+        return json.dumps(data, indent=2).encode('utf-8')
+    
+    _loads = json.loads
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks (e.g. Windows), so only one worker may write
+    fcntl = None
+
 
 class BotRegistry:
-    """Manages bot metadata and lifecycle."""
+    """Manages bot metadata and lifecycle.
+    
+    The registry is served from memory. Updates change the in-memory copy
+    and schedule a debounced write, so a burst of updates costs a single
+    file rewrite. Several BotBuilder workers may share the file: when its
+    mtime shows another worker wrote it, it is reloaded and this worker's
+    unflushed changes are merged on top.
+    """
+    
+    # Seconds to wait for more updates before writing the registry
+    FLUSH_DELAY = 0.1
+    
+    # Seconds between attempts to take the registry lock from another worker
+    LOCK_POLL_INTERVAL = 0.01
     
     def __init__(self):
         self.registry_file = REGISTRY_FILE
+        # Held while a worker merges and rewrites the registry file
+        self.lock_file = self.registry_file.with_suffix('.lock')
         self._ensure_registry_exists()
+        # mtime of the file as last read or written by this worker
+        self._mtime: int = 0
+        self._cache: Dict = self._read_registry()
+        # (user id, bot name) of bots changed here since the last flush
+        self._dirty: Set[Tuple[str, str]] = set()
+        # Serializes writes of the registry file
+        self._lock = asyncio.Lock()
+        # Debounced flush still waiting, and the latest one already writing
+        self._flush_task: Optional[asyncio.Task] = None
+        self._running_flush: Optional[asyncio.Task] = None
     
     def _ensure_registry_exists(self):
         """Create registry file if it doesn't exist."""
@@ -23,16 +70,122 @@ class BotRegistry:
             with open(self.registry_file, 'w') as f:
                 json.dump({}, f)
     
-    async def _load_registry(self) -> Dict:
+    def _read_registry(self) -> Dict:
         """Load registry from file."""
-        async with aiofiles.open(self.registry_file, 'r') as f:
-            content = await f.read()
-            return json.loads(content) if content else {}
+        self._mtime = self.registry_file.stat().st_mtime_ns
+        content = self.registry_file.read_bytes()
+        return _loads(content) if content else {}
+    
+    def _refresh(self):
+        """Reload the file if another worker wrote it, keeping local changes."""
+        if self.registry_file.stat().st_mtime_ns == self._mtime:
+            return
+        
+        registry = self._read_registry()
+        for uid, bot_name in self._dirty:
+            bot = self._cache.get(uid, {}).get(bot_name)
+            if bot is not None:
+                registry.setdefault(uid, {})[bot_name] = bot
+            elif bot_name in registry.get(uid, {}):
+                del registry[uid][bot_name]
+                if not registry[uid]:
+                    del registry[uid]
+        self._cache = registry
+    
+    def _current(self) -> Dict:
+        """Get the registry, picking up other workers' writes."""
+        # While a write is in flight the file is about to be replaced anyway
+        if not self._lock.locked():
+            self._refresh()
+        return self._cache
     
-    async def _save_registry(self, registry: Dict):
+    async def _save_registry(self):
         """Save registry to file."""
-        async with aiofiles.open(self.registry_file, 'w') as f:
-            await f.write(json.dumps(registry, indent=2))
+        async with self._lock:
+            lock_fd = await self._acquire_file_lock()
+            try:
+                # Merge what other workers wrote so this write can't drop it
+                self._refresh()
+                content = _dumps(self._cache)
+                dirty, self._dirty = self._dirty, set()
+                try:
+                    self._mtime = await asyncio.to_thread(self._write_registry, content)
+                except BaseException:
+                    self._dirty |= dirty
+                    raise
+            finally:
+                if lock_fd is not None:
+                    # Closing the descriptor releases the lock
+                    os.close(lock_fd)
+    
+    async def _acquire_file_lock(self) -> Optional[int]:
+        """Wait until this worker holds the cross-process registry lock.
+        
+        Polls a non-blocking flock rather than blocking a worker thread, so
+        a cancelled wait closes the descriptor instead of leaking the lock.
+        """
+        if fcntl is None:
+            return None
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT)
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except BlockingIOError:
+                    await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+        except BaseException:
+            os.close(fd)
+            raise
+    
+    def _write_registry(self, content: bytes) -> int:
+        """Atomically replace the registry file with durable content.
+        
+        Returns the new file's mtime.
+        """
+        # Unique temp file so workers flushing together don't collide
+        fd, tmp_file = tempfile.mkstemp(
+            dir=self.registry_file.parent, prefix=self.registry_file.name, suffix='.tmp'
+        )
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+        os.replace(tmp_file, self.registry_file)
+        return mtime
+    
+    def _schedule_flush(self, uid: str, bot_name: str):
+        """Record a changed bot and write the registry soon, coalescing updates."""
+        self._dirty.add((uid, bot_name))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        """Wait for the debounce delay, then write the registry."""
+        await asyncio.sleep(self.FLUSH_DELAY)
+        # Updates from here on schedule a new flush
+        self._flush_task = None
+        task = self._running_flush = asyncio.current_task()
+        try:
+            await self._save_registry()
+        finally:
+            if self._running_flush is task:
+                self._running_flush = None
+    
+    async def close(self):
+        """Write any pending updates to disk."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        # Flushes write in lock order, so waiting for the latest covers all;
+        # a failed one puts its changes back into _dirty
+        if self._running_flush is not None:
+            await asyncio.gather(self._running_flush, return_exceptions=True)
+        
+        if self._dirty:
+            await self._save_registry()
     
     async def register_bot(
         self,
@@ -43,37 +196,35 @@ class BotRegistry:
         status: str = "running"
     ) -> bool:
         """Register a new bot."""
-        registry = await self._load_registry()
-        
-        # Initialize user entry if not exists
-        if str(user_id) not in registry:
-            registry[str(user_id)] = {}
+        registry = self._current()
+        uid = str(user_id)
         
         # Check if bot name already exists for this user
-        if bot_name in registry[str(user_id)]:
+        if bot_name in registry.get(uid, {}):
             return False
         
-        # Register bot
-        registry[str(user_id)][bot_name] = {
+        # Register bot, initializing the user entry if needed
+        now = datetime.now(timezone.utc).isoformat()
+        registry.setdefault(uid, {})[bot_name] = {
             "bot_token": bot_token,
             "container_id": container_id,
             "status": status,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "created_at": now,
+            "updated_at": now
         }
         
-        await self._save_registry(registry)
+        self._schedule_flush(uid, bot_name)
         return True
     
     async def get_user_bots(self, user_id: int) -> Dict[str, Dict]:
         """Get all bots for a user."""
-        registry = await self._load_registry()
-        return registry.get(str(user_id), {})
+        # Shallow copy so callers can't change the cached registry
+        return self._current().get(str(user_id), {}).copy()
     
     async def get_bot(self, user_id: int, bot_name: str) -> Optional[Dict]:
         """Get specific bot metadata."""
-        bots = await self.get_user_bots(user_id)
-        return bots.get(bot_name)
+        bot = self._current().get(str(user_id), {}).get(bot_name)
+        return bot.copy() if bot is not None else None
     
     async def update_bot_status(
         self,
@@ -83,38 +234,44 @@ class BotRegistry:
         container_id: Optional[str] = None
     ) -> bool:
         """Update bot status."""
-        registry = await self._load_registry()
+        registry = self._current()
+        uid = str(user_id)
         
-        if str(user_id) not in registry or bot_name not in registry[str(user_id)]:
+        if uid not in registry or bot_name not in registry[uid]:
             return False
         
-        bot = registry[str(user_id)][bot_name]
+        bot = registry[uid][bot_name]
+        
+        # Nothing changed, skip rewriting the whole file
+        if bot["status"] == status and container_id in (None, bot["container_id"]):
+            return True
+        
         bot["status"] = status
-        bot["updated_at"] = datetime.now().isoformat()
+        bot["updated_at"] = datetime.now(timezone.utc).isoformat()
         
         if container_id is not None:
             bot["container_id"] = container_id
         
-        await self._save_registry(registry)
+        self._schedule_flush(uid, bot_name)
         return True
     
     async def delete_bot(self, user_id: int, bot_name: str) -> bool:
         """Delete bot from registry."""
-        registry = await self._load_registry()
+        registry = self._current()
+        uid = str(user_id)
         
-        if str(user_id) not in registry or bot_name not in registry[str(user_id)]:
+        if uid not in registry or bot_name not in registry[uid]:
             return False
         
-        del registry[str(user_id)][bot_name]
+        del registry[uid][bot_name]
         
         # Remove user entry if no bots left
-        if not registry[str(user_id)]:
-            del registry[str(user_id)]
+        if not registry[uid]:
+            del registry[uid]
         
-        await self._save_registry(registry)
+        self._schedule_flush(uid, bot_name)
         return True
     
     async def count_user_bots(self, user_id: int) -> int:
         """Count number of bots for a user."""
-        bots = await self.get_user_bots(user_id)
-        return len(bots)
+        return len(self._current().get(str(user_id), ()))
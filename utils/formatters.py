@@ -1,19 +1,22 @@
 """Format output messages for BotBuilder."""
 
+from functools import lru_cache
 from typing import Dict, List
 from services.parser import BotRequirements
 from services.analyzer import BotArchitecture
 
 
+# Markdown special characters mapped to their escaped form
+_MD_ESCAPE_TABLE = str.maketrans({char: f'\\{char}' for char in '*_[]()~`>#+-=|{}.!'})
+
+
+@lru_cache(maxsize=1024)
 def escape_markdown(text: str) -> str:
     """Escape Markdown special characters to prevent parsing errors."""
     if not text:
         return ""
-    # Escape Markdown special characters
-    escape_chars = ['*', '_', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-    for char in escape_chars:
-        text = text.replace(char, f'\\{char}')
-    return text
+    # Single pass over the text instead of one replace() per character
+    return text.translate(_MD_ESCAPE_TABLE)
 
 
 def format_bot_overview(